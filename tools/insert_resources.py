@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 # vim: set fenc=utf-8 ai ts=4 sw=4 sts=4 et:
 
+import os
 import argparse
 from unnamed_snes_game.insert_resources import compile_data, print_resource_sizes, insert_resources_into_binary
 
@@ -17,6 +18,10 @@ def main() -> None:
 
     args = parser.parse_args()
 
+    # The input is memory mapped, truncating it while writing the output would corrupt the mapped data
+    if os.path.exists(args.output) and os.path.samefile(args.output, args.sfc_input):
+        raise RuntimeError(f"Output file cannot be the sfc input file: { args.output }")
+
     data_store = compile_data(args.resources_directory, args.symbols_file)
     if data_store is None:
         raise RuntimeError("Error compiling resources")
@@ -29,8 +34,11 @@ def main() -> None:
     if args.print_usage or args.resource_sizes:
         print(usage.summary())
 
-    with open(args.output, "wb") as fp:
-        fp.write(sfc_data)
+    # `sfc_data` is a file-backed mmap of `sfc_input`, close it once the output has been written
+    with sfc_data:
+        # Write the sfc file with a single unbuffered write (the default 8KiB file buffer is unnecessary here)
+        with open(args.output, "wb", buffering=0) as fp, memoryview(sfc_data) as view:
+            fp.write(view)
 
 
 if __name__ == "__main__":
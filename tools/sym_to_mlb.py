@@ -47,9 +47,11 @@ def parse_snes_sym_file(fp: TextIO, addr_to_rom_offset: Callable[[int], int]) ->
 
     for line in fp:
         if m := SYM_REGEX.match(line):
+            bank_str, addr_str, name = m.groups()
             try:
-                bank = int(m.group(1), 16)
-                cpu_addr = bank << 16 | int(m.group(2), 16)
+                # Parse the bank and address with a single `int()` call
+                cpu_addr = int(bank_str + addr_str, 16)
+                bank = cpu_addr >> 16
 
                 if bank == 0x7E or bank == 0x7F:
                     memory_type = WORK_RAM_MEMORY_TYPE
@@ -63,7 +65,7 @@ def parse_snes_sym_file(fp: TextIO, addr_to_rom_offset: Callable[[int], int]) ->
                     memory_type = SNES_PRG_MEMORY_TYPE
                     addr = addr_to_rom_offset(cpu_addr)
 
-                out.append(Symbol(memory_type=memory_type, addr=addr, name=m.group(3).replace(".", "_").strip()))
+                out.append(Symbol(memory_type=memory_type, addr=addr, name=name.replace(".", "_").strip()))
             except ValueError:
                 pass
 
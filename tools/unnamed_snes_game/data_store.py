@@ -281,7 +281,6 @@ class DataStore:
             if isinstance(c, MetaSpriteResourceData):
                 assert c.resource_type == ResourceType.ms_spritesheets
                 self._msfs_lists[c.resource_id] = c.msfs_entries
-                self._msfa_and_entity_rom_data = None
                 self._msfs_and_entity_data_valid = False
 
             if c.resource_type is not None:
@@ -302,7 +301,6 @@ class DataStore:
                 assert ms.error_key == DYNAMIC_METASPRITES_ERROR_KEY
                 self._dynamic_ms_data = None
                 self._errors[ms.error_key] = ms
-            self._msfa_and_entity_rom_data = None
             self._msfs_and_entity_data_valid = False
 
     def set_msfs_and_entity_data(self, me: Optional[MsFsAndEntityOutput]) -> None:
@@ -368,6 +366,10 @@ class DataStore:
         with self._lock:
             return self._rooms[dungeon_id].get((room_x, room_y))
 
+    def get_room_data_and_not_room_counter(self, dungeon_id: int, room_x: int, room_y: int) -> tuple[Optional[BaseResourceData], int]:
+        with self._lock:
+            return self._rooms[dungeon_id].get((room_x, room_y)), self._not_room_counter
+
     def get_dungeon_rooms(self, dungeon_id: int) -> dict[tuple[int, int], RoomData]:
         with self._lock:
             return self._rooms[dungeon_id].copy()
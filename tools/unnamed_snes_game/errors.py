@@ -4,10 +4,10 @@
 import sys
 from io import StringIO
 
-from typing import Final, Optional, TextIO, Union
+from typing import Final, Optional, TextIO, Type, Union
 from abc import abstractmethod
 
-from .ansi_color import NoAnsiColors, AnsiColors
+from .ansi_color import NoAnsiColors, ForceAnsiColors, AnsiColors
 
 
 class MultilineError(Exception):
@@ -50,28 +50,36 @@ def print_error(msg: str, e: Optional[Union[str, Exception]] = None, fp: Optiona
 
     ac = AnsiColors if fp.isatty() else NoAnsiColors
 
-    fp.write(ac.BOLD + ac.BRIGHT_RED)
-    fp.write(msg)
-    if e:
-        fp.write(": ")
-        fp.write(ac.NORMAL)
-        if isinstance(e, str):
-            fp.write(e)
-        elif isinstance(e, ValueError) or isinstance(e, RuntimeError):
-            fp.write(str(e))
-        elif isinstance(e, FileError):
-            if e.path:
-                fp.write(ac.BOLD + ac.BRIGHT_WHITE)
-                fp.write(e.path[0])
-                fp.write(ac.NORMAL)
-                if len(e.path) > 1:
-                    fp.write(f" { ': '.join(e.path[1:]) }: ")
-                else:
-                    fp.write(": ")
-            fp.write(ac.BRIGHT_RED)
-            fp.write(e.message)
-        elif isinstance(e, MultilineError):
-            e.print_indented(fp)
-        else:
-            fp.write(f"{ type(e).__name__ }({ e })")
-    fp.write(ac.RESET + "\n")
+    fp.write(error_string(msg, e, ac))
+
+
+def error_string(
+    msg: str, e: Optional[Union[str, Exception]] = None, ac: Union[Type[NoAnsiColors], Type[ForceAnsiColors]] = NoAnsiColors
+) -> str:
+    with StringIO() as fp:
+        fp.write(ac.BOLD + ac.BRIGHT_RED)
+        fp.write(msg)
+        if e:
+            fp.write(": ")
+            fp.write(ac.NORMAL)
+            if isinstance(e, str):
+                fp.write(e)
+            elif isinstance(e, (ValueError, RuntimeError)):
+                fp.write(str(e))
+            elif isinstance(e, FileError):
+                if e.path:
+                    fp.write(ac.BOLD + ac.BRIGHT_WHITE)
+                    fp.write(e.path[0])
+                    fp.write(ac.NORMAL)
+                    if len(e.path) > 1:
+                        fp.write(f" { ': '.join(e.path[1:]) }: ")
+                    else:
+                        fp.write(": ")
+                fp.write(ac.BRIGHT_RED)
+                fp.write(e.message)
+            elif isinstance(e, MultilineError):
+                e.print_indented(fp)
+            else:
+                fp.write(f"{ type(e).__name__ }({ e })")
+        fp.write(ac.RESET + "\n")
+        return fp.getvalue()
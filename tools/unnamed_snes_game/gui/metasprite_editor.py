@@ -14,6 +14,9 @@ import tkinter as tk
 import tkinter.ttk as ttk
 import tkinter.messagebox
 
+import PIL.Image  # type: ignore
+import PIL.ImageTk  # type: ignore
+
 from . import gui as gui
 
 from ..metasprite import extract_frame_locations
@@ -36,6 +39,13 @@ HITBOX_COLOR = "#aa0000"
 HURTBOX_WIDTH = 3
 HURTBOX_COLOR = "#0000aa"
 
+IMAGE_TAG = "image"
+LABEL_TAG = "label"
+OBJ_TAG = "obj"
+TILE_HITBOX_TAG = "tilehitbox"
+HITBOX_TAG = "hitbox"
+HURTBOX_TAG = "hurtbox"
+
 
 def load_ms_spritesheet(json_filename: str) -> Optional[OrderedDict[Name, Any]]:
     with open(json_filename, "r") as fp:
@@ -98,9 +108,12 @@ class Canvas:
         self.ms_export_orders: Final = ms_export_orders
 
         self.frameset: Optional[MsFrameset] = None
-        self.image: Optional[tk.PhotoImage] = None
+        self.image: Optional[PIL.ImageTk.PhotoImage] = None
         self.image_source: Optional[Filename] = None
 
+        # Zoomed images, indexed by source filename (with the file's mtime)
+        self._image_cache: dict[Filename, tuple[int, PIL.ImageTk.PhotoImage]] = dict()
+
         self.frame: Final = tk.Frame(main_window)
         self.frame.columnconfigure(0, weight=1)
         self.frame.rowconfigure(1, weight=1)
@@ -110,22 +123,22 @@ class Canvas:
 
         toolbar_column = 1
 
-        def add_show_cb(text: str) -> tk.IntVar:
+        def add_show_cb(text: str, tag: str) -> tk.IntVar:
             nonlocal toolbar_column
 
             v = tk.IntVar()
             v.set(1)
-            cb = tk.Checkbutton(self.frame, text=text, variable=v, command=self._update_canvas)
+            cb = tk.Checkbutton(self.frame, text=text, variable=v, command=lambda: self._set_visibility(tag, v))
             cb.grid(row=0, column=toolbar_column)
 
             toolbar_column += 1
             return v
 
-        self.show_hitboxes = add_show_cb("Hitboxes")
-        self.show_hurtboxes = add_show_cb("Hurtboxes")
-        self.show_tilehitboxes = add_show_cb("TileHitboxes")
-        self.show_objects = add_show_cb("Objects")
-        self.show_labels = add_show_cb("Labels")
+        self.show_hitboxes = add_show_cb("Hitboxes", HITBOX_TAG)
+        self.show_hurtboxes = add_show_cb("Hurtboxes", HURTBOX_TAG)
+        self.show_tilehitboxes = add_show_cb("TileHitboxes", TILE_HITBOX_TAG)
+        self.show_objects = add_show_cb("Objects", OBJ_TAG)
+        self.show_labels = add_show_cb("Labels", LABEL_TAG)
 
         self.canvas_frame = tk.Frame(self.frame)
         self.canvas_frame.grid(row=1, column=0, columnspan=toolbar_column, sticky=tk.NSEW)
@@ -172,6 +185,26 @@ class Canvas:
         self.image = None
         self._update_canvas()
 
+    def _set_visibility(self, tag: str, show: tk.IntVar) -> None:
+        # Only changes the state of the existing items, the canvas is not redrawn
+        self.canvas.itemconfigure(tag, state=tk.NORMAL if show.get() else tk.HIDDEN)
+
+    def _load_image(self, source: Filename) -> PIL.ImageTk.PhotoImage:
+        # The image is only reloaded and zoomed if the file has changed
+        image_fn = os.path.join(self.ms_dir, source)
+        mtime = os.stat(image_fn).st_mtime_ns
+
+        cached = self._image_cache.get(source)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        with PIL.Image.open(image_fn) as image:
+            zoomed_image = image.resize((image.width * ZOOM, image.height * ZOOM), PIL.Image.Resampling.NEAREST)
+            photo_image = PIL.ImageTk.PhotoImage(zoomed_image)
+
+        self._image_cache[source] = (mtime, photo_image)
+        return photo_image
+
     def _update_canvas(self) -> None:
         if self.frameset is None:
             return
@@ -182,7 +215,7 @@ class Canvas:
         # Load image (if image_source changed)
         if fs.source != self.image_source:
             try:
-                self.image = tk.PhotoImage(file=os.path.join(self.ms_dir, fs.source)).zoom(ZOOM, ZOOM)
+                self.image = self._load_image(fs.source)
             except:
                 self.image = None
                 self.image_source = None
@@ -204,14 +237,54 @@ class Canvas:
             self.print_exception_traceback()
             return
 
-        c.delete("all")
-        c.create_image(0, 0, image=self.image, anchor=tk.NW)
-
-        show_labels = self.show_labels.get()
-        show_objects = self.show_objects.get()
-        show_tilehitboxes = self.show_tilehitboxes.get()
-        show_hurtboxes = self.show_hurtboxes.get()
-        show_hitboxes = self.show_hitboxes.get()
+        # Only the overlay is redrawn, the image item is kept (if it exists)
+        c.delete(f"!{ IMAGE_TAG }")
+        if c.find_withtag(IMAGE_TAG):
+            c.itemconfigure(IMAGE_TAG, image=self.image)
+        else:
+            c.create_image(0, 0, image=self.image, anchor=tk.NW, tags=IMAGE_TAG)
+
+        # All overlay items are created (hidden if required) so the show checkbuttons do not need to redraw the canvas
+        label_state = tk.NORMAL if self.show_labels.get() else tk.HIDDEN
+        obj_state = tk.NORMAL if self.show_objects.get() else tk.HIDDEN
+        tilehitbox_state = tk.NORMAL if self.show_tilehitboxes.get() else tk.HIDDEN
+        hurtbox_state = tk.NORMAL if self.show_hurtboxes.get() else tk.HIDDEN
+        hitbox_state = tk.NORMAL if self.show_hitboxes.get() else tk.HIDDEN
+
+        # Tcl canvas item options (built once per redraw)
+        origin_options: Final = ("-width", "1")
+        label_options: Final = ("-anchor", tk.NW, "-tags", LABEL_TAG, "-state", label_state)
+        obj_options: Final = ("-width", str(OBJ_WIDTH), "-outline", OBJ_COLOR, "-tags", OBJ_TAG, "-state", obj_state)
+        tilehitbox_options: Final = (
+            "-width",
+            str(TILE_HITBOX_WIDTH),
+            "-outline",
+            TILE_HITBOX_COLOR,
+            "-tags",
+            TILE_HITBOX_TAG,
+            "-state",
+            tilehitbox_state,
+        )
+        hurtbox_options: Final = (
+            "-width",
+            str(HURTBOX_WIDTH),
+            "-outline",
+            HURTBOX_COLOR,
+            "-tags",
+            HURTBOX_TAG,
+            "-state",
+            hurtbox_state,
+        )
+        hitbox_options: Final = (
+            "-width",
+            str(HITBOX_WIDTH),
+            "-outline",
+            HITBOX_COLOR,
+            "-tags",
+            HITBOX_TAG,
+            "-state",
+            hitbox_state,
+        )
 
         frame_width = ZOOM * fs.frame_width
         frame_height = ZOOM * fs.frame_height
@@ -225,11 +298,30 @@ class Canvas:
         th_y2 = y_origin + fs.tilehitbox.half_height * ZOOM
 
         # Frame grid
-        for x in range(0, image_width + 1, frame_width):
-            c.create_line(((x, 0), (x, image_height)), width=FRAME_WIDTH)
+        # Each axis is drawn as a single zig-zag line (the connecting segments are on the image border)
+        grid_coords: list[tuple[int, int]] = list()
+        for i, x in enumerate(range(0, image_width + 1, frame_width)):
+            if i & 1 == 0:
+                grid_coords += ((x, 0), (x, image_height))
+            else:
+                grid_coords += ((x, image_height), (x, 0))
+        c.create_line(grid_coords, width=FRAME_WIDTH)
 
-        for y in range(0, image_height + 1, frame_height):
-            c.create_line(((0, y), (image_width, y)), width=FRAME_WIDTH)
+        grid_coords.clear()
+        for i, y in enumerate(range(0, image_height + 1, frame_height)):
+            if i & 1 == 0:
+                grid_coords += ((0, y), (image_width, y))
+            else:
+                grid_coords += ((image_width, y), (0, y))
+        c.create_line(grid_coords, width=FRAME_WIDTH)
+
+        # The frame overlays can be thousands of canvas items.
+        # Calling the Tcl canvas command directly skips tkinter's option processing and flattening.
+        tk_call: Final = c.tk.call
+        cw: Final = str(c)
+
+        # Zoomed pattern objects (xpos, ypos, size), many frames share the same pattern
+        zoomed_patterns: dict[Name, list[tuple[int, int, int]]] = dict()
 
         for frame_name, fl in frame_locations.items():
             if not fl.is_clone:
@@ -237,46 +329,54 @@ class Canvas:
                 y = fl.frame_y * ZOOM
 
                 # Draw origin
-                c.create_line(((x + x_origin, y), (x + x_origin, y + frame_height)), width=1)
-                c.create_line(((x, y + y_origin), (x + frame_width, y + y_origin)), width=1)
+                tk_call(cw, "create", "line", x + x_origin, y, x + x_origin, y + frame_height, *origin_options)
+                tk_call(cw, "create", "line", x, y + y_origin, x + frame_width, y + y_origin, *origin_options)
 
-                if show_labels:
-                    c.create_text(x + 5, y + 3, anchor=tk.NW, text=frame_name)
+                tk_call(cw, "create", "text", x + 5, y + 3, "-text", frame_name, *label_options)
 
-                if show_objects and fl.pattern:
+                if fl.pattern:
                     assert fl.x_offset is not None and fl.y_offset is not None
 
-                    for o in fl.pattern.objects:
-                        ox = x + (fl.x_offset + o.xpos) * ZOOM
-                        oy = y + (fl.y_offset + o.ypos) * ZOOM
-                        osize = o.size * ZOOM
-                        c.create_rectangle(ox, oy, ox + osize, oy + osize, width=OBJ_WIDTH, outline=OBJ_COLOR)
+                    zoomed_objects = zoomed_patterns.get(fl.pattern.name)
+                    if zoomed_objects is None:
+                        zoomed_objects = [(o.xpos * ZOOM, o.ypos * ZOOM, o.size * ZOOM) for o in fl.pattern.objects]
+                        zoomed_patterns[fl.pattern.name] = zoomed_objects
+
+                    px = x + fl.x_offset * ZOOM
+                    py = y + fl.y_offset * ZOOM
+
+                    for o_xpos, o_ypos, osize in zoomed_objects:
+                        ox = px + o_xpos
+                        oy = py + o_ypos
+                        tk_call(cw, "create", "rectangle", ox, oy, ox + osize, oy + osize, *obj_options)
 
-                if show_tilehitboxes:
-                    c.create_rectangle(x + th_x1, y + th_y1, x + th_x2, y + th_y2, width=TILE_HITBOX_WIDTH, outline=TILE_HITBOX_COLOR)
+                tk_call(cw, "create", "rectangle", x + th_x1, y + th_y1, x + th_x2, y + th_y2, *tilehitbox_options)
 
-                if show_hurtboxes and fl.hurtbox:
+                if fl.hurtbox:
                     box = fl.hurtbox
-                    c.create_rectangle(
+                    tk_call(
+                        cw,
+                        "create",
+                        "rectangle",
                         x + box.x * ZOOM,
                         y + box.y * ZOOM,
                         x + (box.x + box.width) * ZOOM,
                         y + (box.y + box.height) * ZOOM,
-                        width=HURTBOX_WIDTH,
-                        outline=HURTBOX_COLOR,
+                        *hurtbox_options,
                     )
 
-                if show_hitboxes and fl.hitbox:
+                if fl.hitbox:
                     box = fl.hitbox
-                    if box is not None:
-                        c.create_rectangle(
-                            x + box.x * ZOOM,
-                            y + box.y * ZOOM,
-                            x + (box.x + box.width) * ZOOM,
-                            y + (box.y + box.height) * ZOOM,
-                            width=HITBOX_WIDTH,
-                            outline=HITBOX_COLOR,
-                        )
+                    tk_call(
+                        cw,
+                        "create",
+                        "rectangle",
+                        x + box.x * ZOOM,
+                        y + box.y * ZOOM,
+                        x + (box.x + box.width) * ZOOM,
+                        y + (box.y + box.height) * ZOOM,
+                        *hitbox_options,
+                    )
 
 
 class AnimationEditor:
@@ -708,6 +808,9 @@ class EditorWindow:
 
         self._ms_ss_data_unsaved: bool = False
 
+        # True if a `_redraw_canvas()` call has been scheduled
+        self._redraw_pending: bool = False
+
         # Selected frameset index
         self._frameset_index: int = -1
 
@@ -764,6 +867,16 @@ class EditorWindow:
             except:
                 self.print_exception_traceback()
 
+    def _schedule_redraw_canvas(self) -> None:
+        # Coalesces multiple input changes into a single redraw
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.window.after_idle(self._on_redraw_idle)
+
+    def _on_redraw_idle(self) -> None:
+        self._redraw_pending = False
+        self._redraw_canvas()
+
     def _update_fs_namelists(self) -> None:
         if self.ms_spritesheet_data:
             fs_names = [fs.get("name", "") for fs in self.ms_spritesheet_data["framesets"]]
@@ -854,7 +967,7 @@ class EditorWindow:
     # A non-animation input was changed.
     def on_fs_inputs_changed(self) -> None:
         self._ms_ss_data_unsaved = True
-        self._redraw_canvas()
+        self._schedule_redraw_canvas()
         # ::TODO compile FS data in the background::
 
     def on_fs_animations_changed(self) -> None:
@@ -3,7 +3,12 @@
 # vim: set fenc=utf-8 ai ts=4 sw=4 sts=4 et:
 
 
+import mmap
+import zlib
+import struct
+import bisect
 import os.path
+import functools
 from typing import Callable, Final, NamedTuple, Optional, Union
 
 from .memory_map import (
@@ -33,9 +38,29 @@ def read_binary_file(path: Filename, max_size: int) -> bytes:
         return out
 
 
+def map_binary_file(path: Filename, max_size: int) -> mmap.mmap:
+    """
+    Memory map a binary file with copy-on-write access.
+
+    Changes to the returned mmap are private and are not written back to `path`.
+
+    NOTE: The returned mmap is still backed by `path`.
+          `path` must not be modified or truncated while the mmap is open.
+    """
+    with open(path, "rb") as fp:
+        size = os.fstat(fp.fileno()).st_size
+        if size > max_size:
+            raise RuntimeError(f"File is too large: maximum file size is { max_size }: { path }")
+        if size == 0:
+            raise RuntimeError(f"File is empty: { path }")
+
+        return mmap.mmap(fp.fileno(), size, access=mmap.ACCESS_COPY)
+
+
 def get_largest_rom_address(symbols: dict[str, int]) -> int:
     # assumes max is never a zeropage or low-Ram address
-    return max([a for a in symbols.values() if a & 0xFE0000 != 0x7E])
+    # Work-RAM (banks 0x7e & 0x7f) addresses are ignored
+    return max(a for a in symbols.values() if a & 0xFE0000 != 0x7E0000)
 
 
 ROM_HEADER_V3_ADDR = 0xFFB0
@@ -44,6 +69,12 @@ ROM_HEADER_TITLE_SIZE = 21
 ROM_HEADER_TITLE_ENCODING = "Shift-JIS"  # This is supposed to be `JIS X 0201`, but python does not support it.
 
 
+# 6 spaces (unlicensed game) + 6 zeros
+# The 6 zeros is the important bit, used by the 'RomUpdateRequired' subsystem of resources-over-usb2snes.
+EXPECTED_HEADER_START: Final = (b" " * 6) + bytes(6)
+
+
+@functools.lru_cache(maxsize=8)
 def convert_title(s: str) -> bytes:
     title = s.encode(ROM_HEADER_TITLE_ENCODING).ljust(ROM_HEADER_TITLE_SIZE, b"\x20")
     if len(title) != ROM_HEADER_TITLE_SIZE:
@@ -67,12 +98,9 @@ def validate_sfc_file(sfc_data: bytes, symbols: dict[str, int], mappings: Mappin
     if len(sfc_data) != expected_size:
         raise RuntimeError(f"ERROR:  Expected a sfc file that is { expected_size // 1024 } bytes in size")
 
-    # 6 spaces (unlicensed game) + 6 zeros
-    # The 6 zeros is the important bit, used by the 'RomUpdateRequired' subsystem of resources-over-usb2snes.
-    expected_header_start = (b" " * 6) + bytes(6)
     header_offset = address_to_rom_offset(ROM_HEADER_V3_ADDR)
-    header_start_in_sfc_data = sfc_data[header_offset : header_offset + len(expected_header_start)]
-    if expected_header_start != header_start_in_sfc_data:
+    header_start_in_sfc_data = sfc_data[header_offset : header_offset + len(EXPECTED_HEADER_START)]
+    if EXPECTED_HEADER_START != header_start_in_sfc_data:
         raise RuntimeError("ERROR: Start of header does not match expected value")
 
     title_offset = address_to_rom_offset(ROM_HEADER_TITLE_ADDR)
@@ -108,6 +136,9 @@ class ResourceUsage(NamedTuple):
         return f"{total_used} bytes used, {total_remaining} bytes free ({percent_used:0.1f}% full)"
 
 
+_unpack_u16: Final = struct.Struct("<H").unpack_from
+
+
 class ResourceInserter:
     BANK_END = 0x10000
     BLANK_RESOURCE_ENTRY: Final = bytes([0xFF, 0xFF, 0xFF])
@@ -132,12 +163,22 @@ class ResourceInserter:
 
         self.bank_positions: list[int] = [self.bank_start] * memory_map.n_resource_banks
 
+        # ROM offset of the start of each resource bank.
+        # (The bank is contiguous in the ROM, the offset of any address within a bank can be calculated from this value)
+        self._bank_rom_offsets: Final[list[RomOffset]] = [
+            self.address_to_rom_offset(((self.bank_offset + i) << 16) | self.bank_start) for i in range(self.n_resource_banks)
+        ]
+
         self.res_table_addr: Final = (self.bank_offset + RESOURCE_ADDR_TABLE_BANK_OFFSET) << 16
         self.res_table_pos: int = 0
         self.res_table: memoryview = self.subview_addr(self.res_table_addr, n_resources * 3)
 
         self.bank_positions[RESOURCE_ADDR_TABLE_BANK_OFFSET] = n_resources * 3
 
+        # Sorted list of `(remaining_space, bank_id)` tuples.
+        # MUST be updated whenever `bank_positions` changes (use `_set_bank_position()`).
+        self._free_banks: list[tuple[int, int]] = sorted((self.BANK_END - p, i) for i, p in enumerate(self.bank_positions))
+
         validate_sfc_file(sfc_view, symbols, mappings)
 
     def usage_table(self) -> ResourceUsage:
@@ -150,43 +191,63 @@ class ResourceInserter:
         return self.view[self.address_to_rom_offset(addr)]
 
     def read_u16(self, addr: Address) -> int:
-        ra = self.address_to_rom_offset(addr)
-        return self.view[ra] | (self.view[ra + 1] << 8)
+        value: int = _unpack_u16(self.view, self.address_to_rom_offset(addr))[0]
+        return value
 
     def subview_addr(self, addr: Address, size: int) -> memoryview:
         o = self.address_to_rom_offset(addr)
         return self.view[o : o + size]
 
-    def insert_engine_data(self, engine_data: EngineData) -> Address:
-        assert isinstance(engine_data, EngineData)
+    def _set_bank_position(self, bank_id: int, position: int) -> None:
+        old_entry = (self.BANK_END - self.bank_positions[bank_id], bank_id)
+        del self._free_banks[bisect.bisect_left(self._free_banks, old_entry)]
 
-        data_size = engine_data.size()
-        assert data_size > 0 and data_size <= self.bank_size
+        self.bank_positions[bank_id] = position
+        bisect.insort(self._free_banks, (self.BANK_END - position, bank_id))
+
+    def _allocate(self, size: int) -> tuple[Address, memoryview]:
+        """
+        Reserve `size` bytes in the resource bank with the least amount of free space that can fit the block (best-fit).
+
+        Returns the address and a ROM subview of the reserved block.
+        The caller is responsible for filling the subview.
+        """
+        k = bisect.bisect_left(self._free_banks, (size, 0))
+        if k >= len(self._free_banks):
+            raise RuntimeError(f"Cannot fit blob of size { size } into binary")
 
-        for i in range(len(self.bank_positions)):
-            if self.bank_positions[i] + data_size <= self.BANK_END:
-                addr = ((self.bank_offset + i) << 16) + self.bank_positions[i]
+        i = self._free_banks[k][1]
+        u16_addr = self.bank_positions[i]
 
-                rom_offset = self.address_to_rom_offset(addr)
-                rom_offset_end = rom_offset + data_size
+        addr = ((self.bank_offset + i) << 16) + u16_addr
+        rom_offset = self._bank_rom_offsets[i] + (u16_addr - self.bank_start)
 
-                def write_data(d: bytes) -> None:
-                    nonlocal rom_offset
-                    self.view[rom_offset : rom_offset + len(d)] = d
-                    rom_offset += len(d)
+        self._set_bank_position(i, u16_addr + size)
+
+        return addr, self.view[rom_offset : rom_offset + size]
+
+    def insert_engine_data(self, engine_data: EngineData) -> Address:
+        assert isinstance(engine_data, EngineData)
 
-                if engine_data.ram_data is not None:
-                    write_data(engine_data.ram_data.data())
-                if engine_data.ppu_data is not None:
-                    write_data(engine_data.ppu_data.data())
+        data_size = engine_data.size()
+        assert data_size > 0 and data_size <= self.bank_size
 
-                assert rom_offset == rom_offset_end
+        addr, block = self._allocate(data_size)
 
-                self.bank_positions[i] += data_size
+        # Write the data directly into the reserved block (no intermediate concatenation)
+        pos = 0
+        if engine_data.ram_data is not None:
+            d = engine_data.ram_data.data()
+            block[pos : pos + len(d)] = d
+            pos += len(d)
+        if engine_data.ppu_data is not None:
+            d = engine_data.ppu_data.data()
+            block[pos : pos + len(d)] = d
+            pos += len(d)
 
-                return addr
+        assert pos == data_size
 
-        raise RuntimeError(f"Cannot fit blob of size { data_size } into binary")
+        return addr
 
     def insert_blob_at_label(self, label: str, blob: bytes) -> None:
         # NOTE: There is no boundary checking.  This could override data if I am not careful.
@@ -206,11 +267,11 @@ class ResourceInserter:
             raise RuntimeError("Cannot fit blob of size { blob_size } into binary")
 
         addr: Address = ((self.bank_offset + bank_id) << 16) + u16_addr
-        rom_offset = self.address_to_rom_offset(addr)
+        rom_offset = self._bank_rom_offsets[bank_id]
 
         self.view[rom_offset : rom_offset + blob_size] = blob
 
-        self.bank_positions[bank_id] += blob_size
+        self._set_bank_position(bank_id, u16_addr + blob_size)
 
         return addr
 
@@ -234,14 +295,15 @@ class ResourceInserter:
         self.view[rtt_pos + 1] = r_table_addr & 0xFF
         self.view[rtt_pos + 2] = r_table_addr >> 8
 
+        res_table: Final = self.res_table
+        insert_engine_data: Final = self.insert_engine_data
+
         for data in resource_data:
-            addr = self.insert_engine_data(data)
+            addr = insert_engine_data(data)
 
-            assert self.res_table[table_pos : table_pos + 3] == self.BLANK_RESOURCE_ENTRY
+            assert res_table[table_pos : table_pos + 3] == self.BLANK_RESOURCE_ENTRY
 
-            self.res_table[table_pos + 0] = addr & 0xFF
-            self.res_table[table_pos + 1] = (addr >> 8) & 0xFF
-            self.res_table[table_pos + 2] = addr >> 16
+            res_table[table_pos : table_pos + 3] = addr.to_bytes(3, "little")
 
             table_pos += 3
         self.res_table_pos = table_pos
@@ -277,6 +339,47 @@ def insert_resources(sfc_view: memoryview, data_store: DataStore) -> ResourceUsa
     return ri.usage_table()
 
 
+# Maximum block size where the sum of all bytes in the block (+1) is less than the Adler-32 modulus (65521)
+_BYTE_SUM_BLOCK_SIZE: Final = 256
+
+
+def byte_sum(data: memoryview) -> int:
+    """
+    Returns the sum of all bytes in `data`.
+
+    Uses the `A` component of `zlib.adler32()` (`1 + sum(block) mod 65521`) to sum the bytes in C.
+    The block size is small enough that the modulo never occurs.
+    """
+    adler32: Final = zlib.adler32
+
+    n_blocks: Final = (len(data) + _BYTE_SUM_BLOCK_SIZE - 1) // _BYTE_SUM_BLOCK_SIZE
+
+    s = sum([adler32(data[i : i + _BYTE_SUM_BLOCK_SIZE]) & 0xFFFF for i in range(0, len(data), _BYTE_SUM_BLOCK_SIZE)])
+
+    return s - n_blocks
+
+
+def mirrored_byte_sum(data: memoryview, size: int) -> int:
+    """
+    Returns the sum of all bytes in `data` after `data` has been mirrored to fill `size` bytes.
+
+    `size` MUST be a power of two and >= `len(data)`.
+
+    Non-power-of-two ROMs are mirrored the same way as the SNES memory map,
+    ie, a 3MiB ROM is the first 2MiB, followed by the last 1MiB twice.
+    """
+    data_size: Final = len(data)
+    assert size.bit_count() == 1 and size >= data_size and data_size > 0
+
+    if data_size.bit_count() == 1:
+        return byte_sum(data) * (size // data_size)
+
+    # Largest power of two that is smaller than data_size
+    p = 1 << (data_size.bit_length() - 1)
+
+    return (byte_sum(data[:p]) + mirrored_byte_sum(data[p:], p)) * (size // (p * 2))
+
+
 def update_checksum(sfc_view: memoryview, memory_map: MemoryMap) -> None:
     """
     Update the SFC header checksum in `sfc_view` (in place).
@@ -288,11 +391,10 @@ def update_checksum(sfc_view: memoryview, memory_map: MemoryMap) -> None:
     if len(sfc_view) % mm_mode.bank_size != 0:
         raise RuntimeError(f"sfc file has an invalid size (expected a multiple of { mm_mode.bank_size })")
 
-    if len(sfc_view).bit_count() != 1:
-        # ::TODO handle non-power of two ROM sizes::
-        raise RuntimeError("Invalid sfc file size (must be a power of two in size)")
+    # Round up to the next power of two
+    mirrored_size: Final = 1 << (len(sfc_view) - 1).bit_length()
 
-    checksum = sum(sfc_view)
+    checksum = mirrored_byte_sum(sfc_view, mirrored_size)
 
     # Remove the old checksum/complement
     checksum -= sum(sfc_view[cs_header_offset : cs_header_offset + 4])
@@ -382,8 +484,9 @@ def print_resource_sizes(data_store: DataStore) -> None:
         print()
 
 
-def insert_resources_into_binary(data_store: DataStore, sfc_input: Filename) -> tuple[bytes, ResourceUsage]:
-    sfc_data = bytearray(read_binary_file(sfc_input, 4 * 1024 * 1024))
+def insert_resources_into_binary(data_store: DataStore, sfc_input: Filename) -> tuple[mmap.mmap, ResourceUsage]:
+    # Copy-on-write mapping, `sfc_input` is not modified
+    sfc_data = map_binary_file(sfc_input, 4 * 1024 * 1024)
     sfc_memoryview = memoryview(sfc_data)
 
     usage = insert_resources(sfc_memoryview, data_store)
@@ -942,17 +942,19 @@ def extract_frame_locations(
         raise FramesetError(fs, errors)
 
     frames_per_row: Final = image_width // fs.frame_width
+    get_pattern: Final = ms_export_orders.patterns.get
 
     for frame_number, frame_name in enumerate(fs.frames):
         if frame_name in frame_locations:
             errors.append(f"Duplicate frame name: { frame_name }")
 
-        frame_x = (frame_number % frames_per_row) * fs.frame_width
-        frame_y = (frame_number // frames_per_row) * fs.frame_height
+        frame_row, frame_column = divmod(frame_number, frames_per_row)
+        frame_x = frame_column * fs.frame_width
+        frame_y = frame_row * fs.frame_height
 
         layout = layouts[frame_number]
         if layout:
-            pattern = ms_export_orders.patterns.get(layout.pattern)
+            pattern = get_pattern(layout.pattern)
             if pattern is not None:
                 frame_locations[frame_name] = FrameLocation(
                     is_clone=False,
@@ -7,8 +7,9 @@ import re
 import os
 import os.path
 from abc import abstractmethod, ABCMeta
+from concurrent.futures import ThreadPoolExecutor
 from enum import unique, auto, Enum
-from typing import cast, final, Any, Callable, Final, Optional, Sequence, Set, Union
+from typing import cast, final, Any, Callable, Final, Iterator, Optional, Sequence, Set, Union
 
 from .enums import ResourceType
 from .entity_data import create_entity_rom_data
@@ -87,23 +88,37 @@ def find_all_tmx_files(dungeons: DungeonsJson) -> list[str]:
 REBUILD_REQUIRED_MAPPINS: Final = (SharedInputType.MAPPINGS, SharedInputType.ENTITIES, SharedInputType.MS_EXPORT_ORDER)
 
 
+SYMBOLS_FILE_BUFFER_SIZE: Final = 128 * 1024
+
+# The symbol file addresses are uppercase hexadecimal
+SYMBOLS_FILE_HEX_DIGITS: Final = frozenset("0123456789ABCDEF")
+
+
 def read_symbols_file(symbol_filename: Filename) -> dict[str, int]:
-    regex = re.compile(r"([0-9A-F]{2}):([0-9A-F]{4}) (.+)")
+    # Symbol file lines have a fixed layout: `BB:AAAA name`
+    # Slicing the line is significantly faster than a regex on large symbol files.
 
     out = dict()
 
-    with open(symbol_filename, "r") as fp:
+    with open(symbol_filename, "r", buffering=SYMBOLS_FILE_BUFFER_SIZE) as fp:
         for line in fp:
             line = line.strip()
 
             if line == "[labels]":
                 continue
 
-            m = regex.match(line)
-            if not m:
+            # Validating the address characters ensures `int()` cannot accept signs, underscores or whitespace
+            if (
+                len(line) < 9
+                or line[2] != ":"
+                or line[7] != " "
+                or not SYMBOLS_FILE_HEX_DIGITS.issuperset(line[0:2])
+                or not SYMBOLS_FILE_HEX_DIGITS.issuperset(line[3:7])
+            ):
                 raise ValueError("Cannot read symbol file: invalid line")
-            addr = (int(m.group(1), 16) << 16) | (int(m.group(2), 16))
-            out[m.group(3)] = addr
+
+            addr = (int(line[0:2], 16) << 16) | int(line[3:7], 16)
+            out[line[8:]] = addr
 
     return out
 
@@ -320,8 +335,9 @@ class MsSpritesheetCompiler(BaseResourceCompiler):
         self.data_store: Final = data_store
 
     def test_filename_is_resource(self, filename: Filename) -> Optional[int]:
-        if m := MS_SPRITESHEET_FILE_REGEX.match(filename):
-            return self.name_map.get(m.group(1))
+        if filename.startswith("metasprites/"):
+            if m := MS_SPRITESHEET_FILE_REGEX.match(filename):
+                return self.name_map.get(m.group(1))
         return None
 
     SHARED_INPUTS = (SharedInputType.MS_EXPORT_ORDER,)
@@ -392,8 +408,9 @@ class MetaTileTilesetCompiler(SimpleResourceCompiler):
         self.__data_store: Final = data_store
 
     def test_filename_is_resource(self, filename: Filename) -> Optional[int]:
-        if m := MT_TILESET_FILE_REGEX.match(filename):
-            return self.name_map.get(m.group(1))
+        if filename.startswith("metatiles/"):
+            if m := MT_TILESET_FILE_REGEX.match(filename):
+                return self.name_map.get(m.group(1))
         return None
 
     SHARED_INPUTS = (SharedInputType.MAPPINGS,)
@@ -963,7 +980,15 @@ class ProjectCompiler:
         self.data_store.set_msfs_and_entity_data(data)
 
     def __compile_resource_lists(self, to_recompile: Set[Optional[ResourceType]]) -> None:
-        # Uses multiprocessing to speed up the compilation
+        # Uses a thread pool to overlap the file reads (and `tad-compiler` subprocesses) of each resource list.
+        #
+        # THREAD SAFETY: `compile_resource()` and `compile_room()` only read the shared inputs and
+        # access `data_store` via its (thread safe) methods.
+        #
+        # The results are inserted into `data_store` in resource-type and resource-id order to keep the
+        # output (and error log) deterministic.  A resource list is submitted to the executor as soon as
+        # the resource lists it depends on (`DEPENDENCIES`) have been inserted into `data_store`, so
+        # independent resource lists are compiled concurrently.
 
         if self.__shared_inputs_with_errors:
             self._log_cannot_compile_si_error("resources")
@@ -984,23 +1009,41 @@ class ProjectCompiler:
 
         self.data_store.reset_resources(to_recompile)
 
-        for rt in ResourceType:
-            if rt in to_recompile:
-                c = self.__resource_compilers[rt]
-                for i in range(len(c.name_list)):
-                    co = c.compile_resource(i)
+        # Limited to one compile per CPU core.
+        # `AudioCompiler` runs `tad-compiler` subprocesses with a timeout, which can expire if the CPU is oversubscribed.
+        with ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="compiler") as executor:
+            # Scan the dungeon directories while the other resource lists are compiling
+            if None in to_recompile:
+                assert self.__shared_input.dungeons
+                tmx_files_future = executor.submit(find_all_tmx_files, self.__shared_input.dungeons)
+
+            rt_to_compile: Final = [rt for rt in ResourceType if rt in to_recompile]
+            completed: set[ResourceType] = set()
+            submitted: dict[ResourceType, Iterator[BaseResourceData]] = dict()
+
+            def submit_ready_resource_lists() -> None:
+                for rt in rt_to_compile:
+                    if rt not in submitted:
+                        c = self.__resource_compilers[rt]
+                        if all(d in completed or d not in to_recompile for d in c.DEPENDENCIES):
+                            submitted[rt] = executor.map(c.compile_resource, range(len(c.name_list)))
+
+            for rt in rt_to_compile:
+                submit_ready_resource_lists()
+
+                # ASSUMES: A resource type's DEPENDENCIES are before it in `ResourceType`
+                for co in submitted[rt]:
                     self.data_store.insert_data(co)
                     if isinstance(co, ResourceError):
                         self.log_error(co)
 
-        if None in to_recompile:
-            assert self.__shared_input.dungeons
+                completed.add(rt)
 
-            for fn in find_all_tmx_files(self.__shared_input.dungeons):
-                co = self.__room_compiler.compile_room(fn)
-                self.data_store.insert_data(co)
-                if isinstance(co, ResourceError):
-                    self.log_error(co)
+            if None in to_recompile:
+                for co in executor.map(self.__room_compiler.compile_room, tmx_files_future.result()):
+                    self.data_store.insert_data(co)
+                    if isinstance(co, ResourceError):
+                        self.log_error(co)
 
         if ResourceType.ms_spritesheets in to_recompile:
             self.__compile_dynamic_metasprites()
@@ -59,16 +59,11 @@ from .memory_map import (
     USB2SNES_DATA_BANK_OFFSET,
     USE_RESOURCES_OVER_USB2SNES_LABEL,
 )
-from .errors import print_error as __print_error
-
+from .errors import error_string
 
 # Sleep delay when waiting for the device to run the correct ROM
 INCORRECT_ROM_SLEEP_DELAY: Final[float] = 3.0
 
-# Sleep delay when waiting on a resource
-# (seconds)
-WAITING_FOR_RESOURCE_DELAY: Final[float] = 0.5
-
 # Sleep delay when there is no request to process
 # (seconds)
 NORMAL_REQUEST_SLEEP_DELAY: Final[float] = 1 / 10
@@ -78,13 +73,21 @@ NORMAL_REQUEST_SLEEP_DELAY: Final[float] = 1 / 10
 # (seconds)
 BURST_SLEEP_DELAY: Final[float] = 1 / 100
 
-# Sleep delay when waiting for `update_requested_spinloop` signal
+# Initial sleep delay when waiting for `update_requested_spinloop` signal
 UPDATE_ROM_SPINLOOP_SLEEP_DELAY: Final[float] = 1 / 60
 
+# The `update_requested_spinloop` sleep delay is doubled after every failed test, up to this value.
+# (Reduces the number of Work-RAM reads while the console is resetting)
+UPDATE_ROM_SPINLOOP_MAX_SLEEP_DELAY: Final[float] = 1 / 8
+
 
-# Number of times to sleep for `BURST_SLEEP_DELAY`, before returning to `NORMAL_REQUEST_SLEEP_DELAY`
+# Number of times to sleep for `BURST_SLEEP_DELAY`, before backing off to `NORMAL_REQUEST_SLEEP_DELAY`
 BURST_COUNT: Final[int] = 5
 
+# The request sleep delay is multiplied by this value after the burst,
+# until it reaches `NORMAL_REQUEST_SLEEP_DELAY`.
+REQUEST_SLEEP_BACKOFF: Final[float] = 2.0
+
 
 N_RESOURCE_TYPES: Final[int] = len(ResourceType)
 
@@ -115,16 +118,18 @@ __log_lock: Final = threading.Lock()
 
 # Thread safe printing
 def __log(s: str, c: str) -> None:
+    # Build the line outside the lock, only the write is serialised
+    line: Final = c + s + AnsiColors.RESET + "\n"
     with __log_lock:
-        sys.stdout.write(c)
-        sys.stdout.write(s)
-        sys.stdout.write(AnsiColors.RESET + "\n")
+        sys.stdout.write(line)
 
 
 # Thread safe printing
 def log_error(s: str, e: Optional[Union[Exception, str]] = None) -> None:
+    # Format the error outside the lock, only the write is serialised
+    msg: Final = error_string(s, e, AnsiColors)
     with __log_lock:
-        __print_error(s, e, sys.stdout)
+        sys.stdout.write(msg)
 
 
 def log_compiler_error(e: Union[ResourceError, Exception, str]) -> None:
@@ -299,7 +304,8 @@ class FsWatcherSignals(metaclass=ABCMeta):
 
     def send_disconnect_event(self) -> None:
         self._disconnect_event.set()
-        # Interrupt `sleep()` and `wait_until_*()` events
+        # Interrupt `sleep()`, `request_sleep()` and `wait_until_*()` events
+        self._interrupt_request_sleep_event.set()
         self._sym_file_changed_event.set()
         self._resource_changed_event.set()
 
@@ -317,7 +323,8 @@ class FsWatcherSignals(metaclass=ABCMeta):
 
     def set_rebuild_required_flag(self) -> None:
         self._rebuild_required_event.set()
-        # Interrupt `sleep()` and `wait_until_resource_changed()`
+        # Interrupt `request_sleep()` and `wait_until_resource_changed()`
+        self._interrupt_request_sleep_event.set()
         self._resource_changed_event.set()
 
     def sfc_file_changed(self) -> None:
@@ -431,10 +438,15 @@ class BgThread(threading.Thread):
 # ==================
 
 
+# Editor temporary/swap files.
+# Filtered by watchdog before the event reaches `FsEventHandler`.
+FS_WATCHER_IGNORE_PATTERNS: Final = ("*~", "*.swp", "*.swx", "*/.#*", "*/4913")
+
+
 # ASSUMES: current working directory is the resources directory
-class FsEventHandler(watchdog.events.FileSystemEventHandler):
+class FsEventHandler(watchdog.events.PatternMatchingEventHandler):
     def __init__(self, signals: FsWatcherSignals, data_store: DataStore, sym_filename: Filename):
-        super().__init__()
+        super().__init__(ignore_patterns=list(FS_WATCHER_IGNORE_PATTERNS), ignore_directories=True)
 
         self.signals: Final = signals
         self.data_store: Final = data_store
@@ -464,8 +476,12 @@ class FsEventHandler(watchdog.events.FileSystemEventHandler):
             self.process_file(event.dest_path)
 
     def process_file(self, src_path: str) -> None:
-        filename: Final = src_path.removeprefix("./")
-        ext = os.path.splitext(filename)[1]
+        # Resource filenames always use `/` as the path separator
+        filename: Final = src_path.replace(os.sep, "/").removeprefix("./")
+        if filename.startswith(".git/"):
+            return
+
+        ext = os.path.splitext(filename)[1].lower()
 
         log_fs_watcher(f"File Changed: { filename }")
 
@@ -597,6 +613,12 @@ class Usb2Snes:
             )
         )
 
+    def _request_address(self, opcode: str, offset: int, size: int) -> None:
+        # Used by the GetAddress/PutAddress hot path.
+        # The request is built without a dict or `json.dumps()`, the hex operands do not need escaping.
+        self._assert_attached()
+        self._socket.send(f'{{"Opcode": "{ opcode }", "Space": "SNES", "Flags": null, "Operands": ["{ offset :#x}", "{ size :#x}"]}}')
+
     def _response(self) -> list[str]:
         r = json.loads(self._socket.recv())
         r = r["Results"]
@@ -651,22 +673,23 @@ class Usb2Snes:
         if size < 0:
             raise ValueError("Invalid size")
 
-        self._request("GetAddress", hex(offset), hex(size))
+        self._request_address("GetAddress", offset, size)
 
-        out = bytes()
+        out = bytearray()
 
         # This loop is required.
         # On my system, Work-RAM addresses are sent in 128 byte blocks.
         while len(out) < size:
             o = self._socket.recv()
             if not isinstance(o, bytes):
-                raise RuntimeError(f"Unknown response from QUsb2Snes, expected bytes got { type(out) }")
+                raise RuntimeError(f"Unknown response from QUsb2Snes, expected bytes got { type(o) }")
+            # bytearray extends in amortised linear time, unlike `bytes += bytes`
             out += o
 
         if len(out) != size:
             raise RuntimeError(f"Size mismatch: got { len(out) } bytes, expected { size }")
 
-        return out
+        return bytes(out)
 
     def write_to_offset(self, offset: int, data: bytes) -> None:
         if not isinstance(data, bytes) and not isinstance(data, bytearray):
@@ -680,7 +703,7 @@ class Usb2Snes:
         if size == 0:
             return
 
-        self._request("PutAddress", hex(offset), hex(size))
+        self._request_address("PutAddress", offset, size)
 
         for chunk_start in range(0, size, self.BLOCK_SIZE):
             chunk_end = min(chunk_start + self.BLOCK_SIZE, size)
@@ -748,6 +771,14 @@ class ResourcesOverUsb2Snes:
         # (setting it to a value > 0x100 to ensure no commands are sent until the next `sync_command_id()`)
         self.previous_command_id: int = 0x1000
 
+        # Reused by `write_response()`.
+        # Safe to reuse as `Usb2Snes.write_to_offset()` sends the data before returning.
+        self._response_buffer: Final = bytearray(RESPONSE_SIZE)
+
+        # `r_type_id` to request type lookup table, used by `read_request()`.
+        # (`None` if `r_type_id` is invalid)
+        self._request_type_lut: Final = tuple(self.__decode_request_type(i) for i in range(256))
+
     def update_mappings(self, mappings: Mappings, symbols: dict[Name, int], n_entities: int) -> None:
         memory_map = mappings.memory_map
 
@@ -797,26 +828,34 @@ class ResourcesOverUsb2Snes:
         n_bytes_to_test: Final = (memory_map.first_resource_bank & 0x3F) * memory_map.mode.bank_size
         assert len(sfc_file_data) >= n_bytes_to_test
 
-        usb2snes_data = bytearray(self.usb2snes.read_offset(0, n_bytes_to_test))
-
-        # Ignore any changes to the `Response` byte
-        p1 = self.response_offset
-        p2 = self.response_offset + RESPONSE_SIZE
-        assert p2 < n_bytes_to_test
-        usb2snes_data[p1:p2] = sfc_file_data[p1:p2]
-
-        # Ignore any changes to `entity_rom_data`
-        p1 = self.entity_rom_data_offset
-        p2 = self.entity_rom_data_offset + self.expected_entity_rom_data_size
-        assert p2 < n_bytes_to_test
-        usb2snes_data[p1:p2] = sfc_file_data[p1:p2]
+        # Using memoryviews to prevent copying `sfc_file_data` and `usb2snes_data` slices
+        sfc_view: Final = memoryview(sfc_file_data)
+        usb2snes_data: Final = memoryview(self.usb2snes.read_offset(0, n_bytes_to_test))
+
+        # Regions to skip when comparing the data
+        ignored_regions: Final = sorted(
+            (
+                # Ignore any changes to the `Response` byte
+                (self.response_offset, self.response_offset + RESPONSE_SIZE),
+                # Ignore any changes to `entity_rom_data`
+                (self.entity_rom_data_offset, self.entity_rom_data_offset + self.expected_entity_rom_data_size),
+            )
+        )
+        for p1, p2 in ignored_regions:
+            assert p2 < n_bytes_to_test
 
         urou2s_data = self.usb2snes.read_offset(self.urou2s_offset, 1)
         if urou2s_data != b"\xff":
             log_error(f"{ self.usb2snes.device_name() } is not running the build without resources")
             return False
 
-        return usb2snes_data == sfc_file_data[:n_bytes_to_test]
+        pos = 0
+        for p1, p2 in ignored_regions:
+            if usb2snes_data[pos:p1] != sfc_view[pos:p1]:
+                return False
+            pos = max(pos, p2)
+
+        return usb2snes_data[pos:n_bytes_to_test] == sfc_view[pos:n_bytes_to_test]
 
     def reset_and_update_rom(self, rom_data: bytes) -> None:
         # NOTE: This does not modify the file on the SD-card.
@@ -861,28 +900,33 @@ class ResourcesOverUsb2Snes:
         expected_zeropage: Final = bytes([b]) * 256
 
         zeropage: Optional[bytes] = None
+        delay = UPDATE_ROM_SPINLOOP_SLEEP_DELAY
 
         while zeropage != expected_zeropage:
-            self.signals.sleep(UPDATE_ROM_SPINLOOP_SLEEP_DELAY)
+            self.signals.sleep(delay)
+            delay = min(delay * 2, UPDATE_ROM_SPINLOOP_MAX_SLEEP_DELAY)
             zeropage = self.usb2snes.read_wram_addr(0x7E0000, 256)
 
     R_TYPE_MUL: Final = 3
 
-    def read_request(self) -> Optional[Request]:
-        rb = self.usb2snes.read_wram_addr(self.request_addr, 6)
-
-        r_type_id = rb[1]
-
-        rt: Union[ResourceType, SpecialRequestType]
-        if r_type_id < N_RESOURCE_TYPES * self.R_TYPE_MUL:
-            rt = ResourceType(r_type_id // self.R_TYPE_MUL)
+    @classmethod
+    def __decode_request_type(cls, r_type_id: int) -> Optional[Union[ResourceType, SpecialRequestType]]:
+        if r_type_id < N_RESOURCE_TYPES * cls.R_TYPE_MUL:
+            return ResourceType(r_type_id // cls.R_TYPE_MUL)
         else:
             try:
-                rt = SpecialRequestType(r_type_id)
+                return SpecialRequestType(r_type_id)
             except ValueError:
                 # r_type_id is invalid
                 return None
 
+    def read_request(self) -> Optional[Request]:
+        rb = self.usb2snes.read_wram_addr(self.request_addr, 6)
+
+        rt = self._request_type_lut[rb[1]]
+        if rt is None:
+            return None
+
         return Request(rb[0], rt, rb[2], (rb[3], rb[4]), rb[5])
 
     # NOTE: This method will sleep until the resource data is valid
@@ -919,7 +963,7 @@ class ResourcesOverUsb2Snes:
     def get_room(self, dungeon_id: int, room_pos: tuple[int, int]) -> tuple[ResponseStatus, Optional[bytes]]:
         room_x, room_y = room_pos
 
-        co = self.data_store.get_room_data(dungeon_id, room_x, room_y)
+        co, nrc = self.data_store.get_room_data_and_not_room_counter(dungeon_id, room_x, room_y)
 
         if isinstance(co, ResourceError):
             log_compiler_error(co)
@@ -928,12 +972,11 @@ class ResourcesOverUsb2Snes:
 
             while isinstance(co, ResourceError):
                 self.signals.wait_until_resource_changed()
-                co = self.data_store.get_room_data(dungeon_id, room_x, room_y)
+                co, nrc = self.data_store.get_room_data_and_not_room_counter(dungeon_id, room_x, room_y)
 
         if isinstance(co, ResourceData):
             status = ResponseStatus.OK
 
-            nrc = self.data_store.get_not_room_counter()
             if nrc != self.not_room_counter:
                 self.not_room_counter = nrc
                 status = ResponseStatus.OK_RESOURCES_CHANGED
@@ -1014,7 +1057,7 @@ class ResourcesOverUsb2Snes:
         if data is not None:
             self.usb2snes.write_to_offset(self.response_data_offset, data)
 
-        r = bytearray(RESPONSE_SIZE)
+        r = self._response_buffer
         r[0] = data_size & 0xFF
         r[1] = data_size >> 8
         r[2] = status.value
@@ -1120,11 +1163,14 @@ class ResourcesOverUsb2Snes:
 
     def run(self) -> None:
         burst_read_counter: int = 0
+        sleep_delay: float = NORMAL_REQUEST_SLEEP_DELAY
         current_request_id: int = 0
 
         self.sync_command_id()
 
         while True:
+            request_processed = False
+
             request = self.read_request()
             if request:
                 if request.request_type == SpecialRequestType.init:
@@ -1140,20 +1186,29 @@ class ResourcesOverUsb2Snes:
                         if command:
                             self.send_command(command)
                             burst_read_counter = BURST_COUNT
+                            sleep_delay = BURST_SLEEP_DELAY
 
                     if request.request_id != current_request_id:
                         self.process_request(request)
                         current_request_id = request.request_id
                         burst_read_counter = BURST_COUNT
+                        sleep_delay = BURST_SLEEP_DELAY
+                        request_processed = True
 
                     if self.signals.test_and_clear_gamestate_data_requested():
                         self.read_gamestate_data()
 
-            if burst_read_counter > 0:
+            if request_processed:
+                # Do not sleep, immediately read the next request (the game may be sending a burst of requests).
+                # `request_sleep(0)` is used to test for disconnect and rebuild-required events.
+                self.signals.request_sleep(0)
+            elif burst_read_counter > 0:
                 burst_read_counter -= 1
                 self.signals.request_sleep(BURST_SLEEP_DELAY)
             else:
-                self.signals.request_sleep(NORMAL_REQUEST_SLEEP_DELAY)
+                # Exponential backoff, prevents a sudden latency jump at the end of a burst
+                sleep_delay = min(sleep_delay * REQUEST_SLEEP_BACKOFF, NORMAL_REQUEST_SLEEP_DELAY)
+                self.signals.request_sleep(sleep_delay)
 
 
 # ASSUMES: current working directory is the resources directory